@@ -1,10 +1,15 @@
 import paho.mqtt.client as mqtt
 import requests
 import json
+from bisect import bisect_left, bisect_right
 import sqlite3
 import time
 import logging
+import math
+import operator
 import os
+import re
+import threading
 
 # --- Configuration ---
 def load_settings_from_db(db_path='settings.db'):
@@ -66,6 +71,10 @@ def load_alerts_from_db(db_path='settings.db'):
         cursor.execute("ALTER TABLE alerts ADD COLUMN direction TEXT NOT NULL DEFAULT 'above'")
     except sqlite3.OperationalError:
         pass  # Already exists
+    try:
+        cursor.execute("ALTER TABLE alerts ADD COLUMN expression TEXT")
+    except sqlite3.OperationalError:
+        pass  # Already exists
     # Add alert for MQTT_TOPIC in settings if not already present
     settings = load_settings_from_db(db_path)
     mqtt_topic = settings.get('MQTT_TOPIC') or 'weather'
@@ -75,8 +84,8 @@ def load_alerts_from_db(db_path='settings.db'):
             cursor.execute('''INSERT INTO alerts (topic, threshold, message, max_alerts, period_seconds, direction) VALUES (?, ?, ?, ?, ?, ?)''',
                 (mqtt_topic, 0, 'Default alert for {value}', 1, 3600, 'above'))
             conn.commit()
-    cursor.execute('SELECT id, topic, threshold, message, max_alerts, period_seconds, direction FROM alerts')
-    alerts = [dict(id=row[0], topic=row[1], threshold=row[2], message=row[3], max_alerts=row[4], period_seconds=row[5], direction=row[6]) for row in cursor.fetchall()]
+    cursor.execute('SELECT id, topic, threshold, message, max_alerts, period_seconds, direction, expression FROM alerts')
+    alerts = [dict(id=row[0], topic=row[1], threshold=row[2], message=row[3], max_alerts=row[4], period_seconds=row[5], direction=row[6], expression=row[7]) for row in cursor.fetchall()]
     conn.close()
     return alerts
 
@@ -91,6 +100,18 @@ def can_send_alert(alert_id, max_alerts, period_seconds, db_path='settings.db'):
     conn.close()
     return count < max_alerts
 
+def next_alert_time(alert_id, max_alerts, period_seconds, db_path='settings.db'):
+    # When the rate window next has room: the max_alerts-th most recent
+    # alert drops out of the window period_seconds after it was sent
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT timestamp FROM alert_logs WHERE alert_id=? ORDER BY timestamp DESC LIMIT 1 OFFSET ?', (alert_id, max_alerts - 1))
+    row = cursor.fetchone()
+    conn.close()
+    if row is None:
+        return time.time()
+    return row[0] + period_seconds + 1
+
 def log_alert(alert_id, db_path='settings.db'):
     import time
     now = int(time.time())
@@ -110,6 +131,339 @@ def log_seen_topic(topic, db_path='settings.db'):
     conn.commit()
     conn.close()
 
+# --- Rule Expressions ---
+# Rules combine comparisons on topic values with AND, OR, NOT and parentheses,
+# e.g. "weather/outTemp < 0 AND weather/outHumidity > 90". They are compiled
+# once into closures that take the table of latest values per topic. Topics
+# that are not plain words (e.g. "1wire/temp", spaces, or a topic named
+# "and") can be quoted with double quotes or backticks.
+RULE_TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(?![\w/])
+    |(?P<op><=|>=|==|!=|<|>|\(|\))
+    |"(?P<dquoted>[^"]+)"
+    |`(?P<bquoted>[^`]+)`
+    |(?P<word>[A-Za-z_][\w/.\-]*)
+)""", re.VERBOSE)
+# Limit on nested parentheses / NOT, so the recursive parser cannot overflow
+RULE_MAX_DEPTH = 32
+RULE_COMPARISONS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+
+def tokenize_rule(expression):
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = RULE_TOKEN_RE.match(expression, pos)
+        if not match:
+            pos += len(expression[pos:]) - len(expression[pos:].lstrip())
+            raise ValueError(f"Unexpected character {expression[pos]!r} at position {pos} in rule (quote unusual topics, e.g. \"1wire/temp\")")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind in ('dquoted', 'bquoted'):
+            # Quoted topics are never keywords
+            kind = 'word'
+        elif kind == 'word' and text.upper() in ('AND', 'OR', 'NOT'):
+            kind, text = 'op', text.upper()
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+def compile_comparison(left, op, right):
+    compare = RULE_COMPARISONS[op]
+    def evaluate(values):
+        a = left(values)
+        b = right(values)
+        return a is not None and b is not None and compare(a, b)
+    return evaluate
+
+def compile_rule(expression):
+    """Compile a rule expression into (evaluate, topics).
+
+    evaluate(values) returns True when the rule holds for a dict of latest
+    values by topic; topics lists the topics the rule depends on. A rule
+    never holds until every one of its topics has a value.
+    """
+    tokens = tokenize_rule(expression)
+    topics = []
+    pos = 0
+    depth = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else (None, None)
+
+    def take(expected=None):
+        nonlocal pos
+        kind, text = peek()
+        if kind is None:
+            raise ValueError('Unexpected end of rule')
+        if expected is not None and text != expected:
+            raise ValueError(f"Expected {expected!r} but found {text!r} in rule")
+        pos += 1
+        return kind, text
+
+    def parse_operand():
+        kind, text = take()
+        if kind == 'number':
+            number = float(text)
+            return lambda values: number
+        if kind == 'word':
+            if text not in topics:
+                topics.append(text)
+            return lambda values: values.get(text)
+        raise ValueError(f"Expected a topic or number but found {text!r} in rule")
+
+    def parse_term():
+        nonlocal depth
+        if peek()[1] in ('NOT', '('):
+            depth += 1
+            if depth > RULE_MAX_DEPTH:
+                raise ValueError('Rule is nested too deeply')
+            _, text = take()
+            if text == 'NOT':
+                inner = parse_term()
+                depth -= 1
+                return lambda values: not inner(values)
+            inner = parse_or()
+            take(')')
+            depth -= 1
+            return inner
+        left = parse_operand()
+        kind, op = take()
+        if op not in RULE_COMPARISONS:
+            raise ValueError(f"Expected a comparison but found {op!r} in rule")
+        return compile_comparison(left, op, parse_operand())
+
+    def parse_and():
+        terms = [parse_term()]
+        while peek()[1] == 'AND':
+            take()
+            terms.append(parse_term())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda values: all(term(values) for term in terms)
+
+    def parse_or():
+        terms = [parse_and()]
+        while peek()[1] == 'OR':
+            take()
+            terms.append(parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda values: any(term(values) for term in terms)
+
+    if not tokens:
+        raise ValueError('Rule is empty')
+    evaluate = parse_or()
+    if pos < len(tokens):
+        raise ValueError(f"Unexpected {tokens[pos][1]!r} in rule")
+    if not topics:
+        raise ValueError('Rule must reference at least one topic')
+    compiled = evaluate
+    def evaluate(values):
+        return all(topic in values for topic in topics) and compiled(values)
+    return evaluate, topics
+
+def build_rule_index(alerts):
+    # Map each topic to the compound rules that reference it, so a message
+    # only re-evaluates the rules that depend on its topic
+    index = {}
+    for alert in alerts:
+        if not alert.get('expression'):
+            continue
+        try:
+            evaluate, topics = compile_rule(alert['expression'])
+            compiled = dict(alert, evaluate=evaluate, topics=topics, rule=alert['expression'])
+        except ValueError as e:
+            logging.error(f"Skipping alert {alert['id']}: invalid rule ({e})")
+            continue
+        for topic in compiled['topics']:
+            index.setdefault(topic, []).append(compiled)
+    return index
+
+# --- Threshold Index ---
+def build_threshold_index(alerts):
+    # Keep each topic's simple alerts in two lists sorted by threshold, one
+    # per direction, so the triggered alerts for a value are a single slice
+    index = {}
+    for alert in alerts:
+        if alert.get('expression'):
+            continue
+        direction = alert.get('direction', 'above')
+        if direction == 'stale':
+            continue
+        if direction not in ('above', 'below'):
+            logging.error(f"Skipping alert {alert['id']}: unknown direction '{direction}'")
+            continue
+        # The sorted lists need comparable numbers; NaN would break bisect
+        try:
+            threshold = float(alert['threshold'])
+        except (TypeError, ValueError):
+            threshold = math.nan
+        if math.isnan(threshold):
+            logging.error(f"Skipping alert {alert['id']}: invalid threshold '{alert['threshold']}'")
+            continue
+        entry = index.setdefault(alert['topic'], {'above': [], 'below': []})
+        entry[direction].append(dict(alert, threshold=threshold, rule=f"{alert['topic']} {direction} {threshold}"))
+    for entry in index.values():
+        for direction, rules in entry.items():
+            rules.sort(key=lambda alert: alert['threshold'])
+            entry[direction] = ([alert['threshold'] for alert in rules], rules)
+    return index
+
+def match_thresholds(entry, value):
+    # 'above' alerts fire for thresholds < value, 'below' alerts for thresholds > value
+    thresholds, rules = entry['above']
+    triggered = rules[:bisect_left(thresholds, value)]
+    thresholds, rules = entry['below']
+    return triggered + rules[bisect_right(thresholds, value):]
+
+# --- Stale Detection ---
+# Stale alerts use direction 'stale' and fire when a topic (or each topic
+# matching a + / # filter) has sent nothing for 'threshold' seconds
+STALE_TICK_SECONDS = 1
+STALE_WHEEL_SLOTS = 512
+
+class TimerWheel:
+    """Hashed timer wheel keyed by arbitrary hashable keys.
+
+    schedule() and cancel() are O(1); advance() only looks at the slots for
+    the ticks that have passed instead of scanning every timer.
+    """
+
+    def __init__(self, now, tick_seconds=STALE_TICK_SECONDS, slots=STALE_WHEEL_SLOTS):
+        self.tick_seconds = tick_seconds
+        self.slots = [set() for _ in range(slots)]
+        self.ticks = {}
+        self.current_tick = int(now // tick_seconds)
+
+    def schedule(self, key, deadline):
+        self.cancel(key)
+        # Round up so a timer never fires before its deadline
+        tick = max(-int(-deadline // self.tick_seconds), self.current_tick + 1)
+        self.ticks[key] = tick
+        self.slots[tick % len(self.slots)].add(key)
+
+    def cancel(self, key):
+        tick = self.ticks.pop(key, None)
+        if tick is not None:
+            self.slots[tick % len(self.slots)].discard(key)
+
+    def advance(self, now):
+        target = int(now // self.tick_seconds)
+        expired = []
+        # Timers further out than one revolution share a slot with nearer
+        # ones and stay put until their own tick comes round
+        for step in range(1, min(target - self.current_tick, len(self.slots)) + 1):
+            slot = self.slots[(self.current_tick + step) % len(self.slots)]
+            due = [key for key in slot if self.ticks[key] <= target]
+            for key in due:
+                slot.discard(key)
+                del self.ticks[key]
+            expired.extend(due)
+        self.current_tick = max(self.current_tick, target)
+        return expired
+
+def is_valid_topic_filter(topic):
+    # MQTT rules: '#' only as the whole last level, '+' only as a whole level
+    if not topic:
+        return False
+    levels = topic.split('/')
+    for i, level in enumerate(levels):
+        if '#' in level and (level != '#' or i != len(levels) - 1):
+            return False
+        if '+' in level and level != '+':
+            return False
+    return True
+
+STALE_LOCK = threading.Lock()
+STALE_ALERTS = {}
+STALE_MATCHES = {}
+STALE_KEYS = set()
+LAST_SEEN = {}
+# Used as the last-seen time for topics that have not reported since startup
+STALE_SINCE = time.time()
+STALE_WHEEL = TimerWheel(STALE_SINCE)
+
+def build_stale_alerts(alerts):
+    stale = {}
+    for alert in alerts:
+        if alert.get('direction') == 'stale' and not alert.get('expression'):
+            if not is_valid_topic_filter(alert['topic']):
+                logging.error(f"Skipping alert {alert['id']}: invalid topic filter '{alert['topic']}'")
+                continue
+            stale[alert['id']] = dict(alert, rule=f"{alert['topic']} stale {alert['threshold']}s")
+    return stale
+
+def stale_alerts_for(topic):
+    # Cache which stale alerts match each concrete topic; filters are only
+    # checked the first time a topic is seen
+    matches = STALE_MATCHES.get(topic)
+    if matches is None:
+        matches = [alert for alert in STALE_ALERTS.values() if mqtt.topic_matches_sub(alert['topic'], topic)]
+        STALE_MATCHES[topic] = matches
+    return matches
+
+def note_topic_seen(topic, now):
+    with STALE_LOCK:
+        LAST_SEEN[topic] = now
+        for alert in stale_alerts_for(topic):
+            key = (alert['id'], topic)
+            if key in STALE_KEYS:
+                STALE_KEYS.discard(key)
+                logging.info(f"Stale alert {alert['id']} cleared: data received again on topic '{topic}'")
+            STALE_WHEEL.schedule(key, now + alert['threshold'])
+
+def check_stale_topics(now):
+    with STALE_LOCK:
+        expired = [key for key in STALE_WHEEL.advance(now) if key[0] in STALE_ALERTS]
+        STALE_KEYS.update(expired)
+    for alert_id, topic in expired:
+        alert = STALE_ALERTS[alert_id]
+        silent_for = int(now - LAST_SEEN.get(topic, STALE_SINCE))
+        logging.info(f"Alert triggered for topic '{topic}': no data for {silent_for}s (rule: {alert['rule']})")
+        try:
+            if not send_alert(alert, topic, silent_for):
+                # Rate limited: try again once the rate window has room, so
+                # a long outage is still reported
+                retry_at = next_alert_time(alert_id, alert['max_alerts'], alert['period_seconds'])
+                with STALE_LOCK:
+                    if (alert_id, topic) in STALE_KEYS:
+                        STALE_KEYS.discard((alert_id, topic))
+                        STALE_WHEEL.schedule((alert_id, topic), max(retry_at, now + STALE_TICK_SECONDS))
+        except Exception as e:
+            logging.error(f"Error sending stale alert {alert_id} for topic '{topic}': {e}")
+
+def run_stale_checks():
+    while True:
+        time.sleep(STALE_TICK_SECONDS)
+        try:
+            check_stale_topics(time.time())
+        except Exception as e:
+            logging.error(f"Error checking stale topics: {e}")
+
+def reload_alerts(db_path='settings.db'):
+    # Rebuild every index whenever the alert rules are (re)loaded
+    global ALERTS, RULE_INDEX, THRESHOLD_INDEX, STALE_ALERTS, STALE_WHEEL, STALE_SINCE
+    ALERTS = load_alerts_from_db(db_path)
+    RULE_INDEX = build_rule_index(ALERTS)
+    THRESHOLD_INDEX = build_threshold_index(ALERTS)
+    now = time.time()
+    with STALE_LOCK:
+        STALE_ALERTS = build_stale_alerts(ALERTS)
+        STALE_MATCHES.clear()
+        STALE_KEYS.clear()
+        STALE_SINCE = now
+        STALE_WHEEL = TimerWheel(now)
+        # Exact topics are watched from startup so a sensor that never
+        # reports is caught too; filters start once a matching topic appears
+        for alert in STALE_ALERTS.values():
+            if '+' not in alert['topic'] and '#' not in alert['topic']:
+                STALE_WHEEL.schedule((alert['id'], alert['topic']), LAST_SEEN.get(alert['topic'], now) + alert['threshold'])
+    return ALERTS
+
 # --- Pushover Notification Function ---
 def send_pushover_notification(message):
     import os
@@ -129,20 +483,51 @@ def send_pushover_notification(message):
         print(f"Failed to send notification: {response.text}")
 
 # --- MQTT Callback ---
+# Latest numeric value seen on each topic, shared by all rules
+LATEST_VALUES = {}
+ALERTS = []
+RULE_INDEX = {}
+THRESHOLD_INDEX = {}
+
 def on_connect(client, userdata, flags, rc):
     logging.info(f"Connected to MQTT broker with result code {rc}")
-    # Subscribe to all unique topics in alerts, including subtopics
-    for alert in ALERTS:
-        topic = alert['topic']
+    # Subscribe to every topic a rule depends on, including subtopics
+    stale_topics = {alert['topic'] for alert in STALE_ALERTS.values()}
+    for topic in sorted(set(RULE_INDEX) | set(THRESHOLD_INDEX) | stale_topics):
         if not topic.endswith('#'):
             topic = topic.rstrip('/') + '/#'  # Subscribe to all subtopics
         logging.info(f"Subscribing to topic: {topic}")
-        client.subscribe(topic)
+        try:
+            client.subscribe(topic)
+        except ValueError as e:
+            logging.error(f"Could not subscribe to topic '{topic}': {e}")
+
+
+def send_alert(alert, topic, value):
+    if not can_send_alert(alert['id'], alert['max_alerts'], alert['period_seconds']):
+        logging.info(f"Rate limit reached for alert {alert['id']} (topic: {alert['topic']})")
+        return False
+    threshold = alert['threshold']
+    friendly_name = get_friendly_name(topic)
+    # Always use friendly name as prefix if it is not identical to the topic and not blank
+    if friendly_name and friendly_name != topic:
+        prefix = f"[{friendly_name}] "
+    else:
+        prefix = f"[{topic}] "
+    message = alert['message'].replace('{value}', str(value)).replace('{threshold}', str(threshold))
+    if '{value}' not in alert['message'] and f'(Value:' not in message:
+        message = f"{message} (Value: {value})"
+    message = f"{prefix}{message}"
+    send_pushover_notification(message)
+    log_alert(alert['id'])
+    logging.info(f"Pushover notification sent for alert {alert['id']} on topic '{topic}' with value {value} (rule: {alert['rule']})")
+    return True
 
 
 def on_message(client, userdata, msg):
     try:
         log_seen_topic(msg.topic)
+        note_topic_seen(msg.topic, time.time())
         payload = msg.payload.decode('utf-8')
         logging.info(f"MQTT message received on topic '{msg.topic}': {payload}")
         try:
@@ -150,33 +535,16 @@ def on_message(client, userdata, msg):
         except Exception as e:
             logging.error(f"Could not convert payload to float: {payload} ({e})")
             return
-        for alert in ALERTS:
-            if msg.topic == alert['topic']:
-                direction = alert.get('direction', 'above')
-                threshold = alert['threshold']
-                triggered = False
-                if direction == 'above' and value > threshold:
-                    triggered = True
-                elif direction == 'below' and value < threshold:
-                    triggered = True
-                if triggered:
-                    logging.info(f"Alert triggered for topic '{msg.topic}' with value {value} (threshold {threshold}, direction {direction})")
-                    if can_send_alert(alert['id'], alert['max_alerts'], alert['period_seconds']):
-                        friendly_name = get_friendly_name(msg.topic)
-                        # Always use friendly name as prefix if it is not identical to the topic and not blank
-                        if friendly_name and friendly_name != msg.topic:
-                            prefix = f"[{friendly_name}] "
-                        else:
-                            prefix = f"[{msg.topic}] "
-                        message = alert['message'].replace('{value}', str(value)).replace('{threshold}', str(threshold))
-                        if '{value}' not in alert['message'] and f'(Value:' not in message:
-                            message = f"{message} (Value: {value})"
-                        message = f"{prefix}{message}"
-                        send_pushover_notification(message)
-                        log_alert(alert['id'])
-                        logging.info(f"Pushover notification sent for alert {alert['id']} on topic '{msg.topic}' with value {value} (threshold {threshold}, direction {direction})")
-                    else:
-                        logging.info(f"Rate limit reached for alert {alert['id']} (topic: {alert['topic']})")
+        LATEST_VALUES[msg.topic] = value
+        entry = THRESHOLD_INDEX.get(msg.topic)
+        if entry:
+            for alert in match_thresholds(entry, value):
+                logging.info(f"Alert triggered for topic '{msg.topic}' with value {value} (rule: {alert['rule']})")
+                send_alert(alert, msg.topic, value)
+        for alert in RULE_INDEX.get(msg.topic, ()):
+            if alert['evaluate'](LATEST_VALUES):
+                logging.info(f"Alert triggered for topic '{msg.topic}' with value {value} (rule: {alert['rule']})")
+                send_alert(alert, msg.topic, value)
     except Exception as e:
         logging.error(f"Error processing message on topic '{msg.topic}': {e}")
 
@@ -200,7 +568,7 @@ if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     try:
         settings = load_settings_from_db()
-        ALERTS = load_alerts_from_db()
+        reload_alerts()
         if not ALERTS:
             print("No alerts configured in the database.")
     except Exception as e:
@@ -219,4 +587,7 @@ if __name__ == '__main__':
     client.on_message = on_message
     client.connect(MQTT_BROKER, MQTT_PORT, 60)
     print(f"Listening to MQTT topics for alerts...")
+    # The stale timer wheel ticks on a daemon thread, so the process still
+    # exits (and gets restarted) if the MQTT loop dies
+    threading.Thread(target=run_stale_checks, daemon=True).start()
     client.loop_forever()
@@ -1,6 +1,12 @@
-from flask import Flask, render_template_string, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, Response, render_template_string, request, redirect, url_for, flash, send_file, jsonify
 import sqlite3
 import logging
+import csv
+import io
+import json
+import math
+import os
+import tempfile
 from datetime import datetime
 
 DB_PATH = 'settings.db'
@@ -8,6 +14,22 @@ REQUIRED_KEYS = [
     'MQTT_BROKER', 'MQTT_PORT', 'MQTT_TOPIC', 'MQTT_USERNAME', 'MQTT_PASSWORD',
     'PUSHOVER_USER_KEY', 'PUSHOVER_API_TOKEN'
 ]
+# 'stale' alerts fire when the topic (or topic filter) sends nothing for
+# 'threshold' seconds
+ALERT_DIRECTIONS = ('above', 'below', 'stale')
+# Export name -> (table, [(column, type), ...]); also used to validate imports
+EXPORT_TABLES = {
+    'alerts': ('alerts', [
+        ('id', int), ('topic', str), ('threshold', float), ('message', str),
+        ('max_alerts', int), ('period_seconds', int), ('direction', str),
+        ('expression', str),
+    ]),
+    'friendly_names': ('topic_friendly_names', [('topic', str), ('friendly_name', str)]),
+    'alert_logs': ('alert_logs', [('id', int), ('alert_id', int), ('timestamp', int)]),
+}
+# Columns that may be NULL or absent (e.g. in exports from older versions)
+NULLABLE_IMPORT_COLUMNS = {'friendly_name', 'expression'}
+SNAPSHOT_PAGES_PER_STEP = 1024
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'  # Change this for production
@@ -93,9 +115,17 @@ function testAlert(alertId, btn) {{
 <div class="container mt-4">
 <div class="card"><div class="card-body">
 <h2 class="mb-4">Alert Configurations</h2>
-<a href="/" class="btn btn-secondary mb-3">Back to Settings</a> | <a href="/alert_history" class="btn btn-outline-secondary mb-3">View Alert History</a> | <a href="/download_db" class="btn btn-outline-info mb-3">Download DB</a>
+<a href="/" class="btn btn-secondary mb-3">Back to Settings</a> | <a href="/alert_history" class="btn btn-outline-secondary mb-3">View Alert History</a> | <a href="/download_db" class="btn btn-outline-info mb-3">Download DB</a> | <a href="/export/all.json" class="btn btn-outline-info mb-3">Export JSON</a> | <a href="/export/alerts.csv" class="btn btn-outline-info mb-3">Export Alerts CSV</a> | <a href="/export/alert_logs.csv" class="btn btn-outline-info mb-3">Export History CSV</a>
+<form method="post" action="/import" enctype="multipart/form-data" class="row g-2 align-items-end mb-3">
+  <div class="col-auto">
+    <input type="file" class="form-control" name="snapshot" accept=".json,application/json">
+  </div>
+  <div class="col-auto">
+    <button type="submit" class="btn btn-outline-primary" onclick="return confirm('Import will overwrite alerts, friendly names and history with matching IDs. Continue?');">Import JSON</button>
+  </div>
+</form>
 <table class="table table-striped table-bordered">
-<tr><th>ID</th><th>Topic</th><th>Friendly Name</th><th>IS</th><th>Value</th><th>Message</th><th>Max Alerts</th><th>Period (s)</th><th>Actions</th></tr>
+<tr><th>ID</th><th>Topic</th><th>Friendly Name</th><th>IS</th><th>Value</th><th>Expression</th><th>Message</th><th>Max Alerts</th><th>Period (s)</th><th>Actions</th></tr>
 {{% for alert in alerts %}}
 <tr>
   <td>{{{{alert['id']}}}}</td>
@@ -103,6 +133,7 @@ function testAlert(alertId, btn) {{
   <td>{{{{alert['friendly_name']}}}}</td>
   <td>{{{{alert['direction']}}}}</td>
   <td>{{{{alert['threshold']}}}}</td>
+  <td>{{{{alert['expression'] or ''}}}}</td>
   <td>{{{{alert['message']}}}}</td>
   <td>{{{{alert['max_alerts']}}}}</td>
   <td>{{{{alert['period_seconds']}}}}</td>
@@ -123,22 +154,28 @@ function testAlert(alertId, btn) {{
 <form method="post" action="/alerts/add" class="row g-2 align-items-end">
   <div class="col-auto">
     <label>Topic:</label>
-    <select name="topic" class="form-select">
+    <input type="text" name="topic" class="form-control" list="seen-topics" placeholder="topic or filter (stale only)">
+    <datalist id="seen-topics">
       {{% for t in topics %}}
-        <option value="{{{{t}}}}">{{{{t}}}}</option>
+        <option value="{{{{t}}}}">
       {{% endfor %}}
-    </select>
+    </datalist>
   </div>
   <div class="col-auto">
     <label>IS</label>
     <select name="direction" class="form-select">
       <option value="above">above</option>
       <option value="below">below</option>
+      <option value="stale">stale for (seconds)</option>
     </select>
   </div>
   <div class="col-auto">
     <label>Value:</label>
-    <input type="number" step="any" class="form-control" name="threshold" required>
+    <input type="number" step="any" class="form-control" name="threshold">
+  </div>
+  <div class="col-auto">
+    <label>Expression (optional):</label>
+    <input type="text" class="form-control" name="expression" placeholder="e.g. weather/outTemp &lt; 0 AND weather/outHumidity &gt; 90">
   </div>
   <div class="col-auto">
     <label>Message:</label>
@@ -180,22 +217,28 @@ EDIT_ALERT_TEMPLATE = '''
 <form method="post" class="row g-2 align-items-end">
   <div class="col-auto">
     <label>Topic:</label>
-    <select name="topic" class="form-select">
+    <input type="text" name="topic" class="form-control" list="seen-topics" value="{{alert['topic']}}">
+    <datalist id="seen-topics">
       {% for t in topics %}
-        <option value="{{t}}" {% if alert['topic'] == t %}selected{% endif %}>{{t}}</option>
+        <option value="{{t}}">
       {% endfor %}
-    </select>
+    </datalist>
   </div>
   <div class="col-auto">
     <label>IS</label>
     <select name="direction" class="form-select">
       <option value="above" {% if alert['direction'] == 'above' %}selected{% endif %}>above</option>
       <option value="below" {% if alert['direction'] == 'below' %}selected{% endif %}>below</option>
+      <option value="stale" {% if alert['direction'] == 'stale' %}selected{% endif %}>stale for (seconds)</option>
     </select>
   </div>
   <div class="col-auto">
     <label>Value:</label>
-    <input type="number" step="any" class="form-control" name="threshold" value="{{alert['threshold']}}" required>
+    <input type="number" step="any" class="form-control" name="threshold" value="{{alert['threshold']}}">
+  </div>
+  <div class="col-auto">
+    <label>Expression (optional):</label>
+    <input type="text" class="form-control" name="expression" value="{{alert['expression'] or ''}}" placeholder="e.g. weather/outTemp &lt; 0 AND weather/outHumidity &gt; 90">
   </div>
   <div class="col-auto">
     <label>Message:</label>
@@ -265,6 +308,9 @@ def init_db():
     columns = [row[1] for row in cursor.fetchall()]
     if 'direction' not in columns:
         cursor.execute("ALTER TABLE alerts ADD COLUMN direction TEXT NOT NULL DEFAULT 'above'")
+    # Compound rule expression; NULL for simple threshold alerts
+    if 'expression' not in columns:
+        cursor.execute("ALTER TABLE alerts ADD COLUMN expression TEXT")
     cursor.execute('''CREATE TABLE IF NOT EXISTS alert_logs (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         alert_id INTEGER NOT NULL,
@@ -319,12 +365,15 @@ def set_friendly_name(topic, friendly_name):
     cursor = conn.cursor()
     cursor.execute('''INSERT INTO topic_friendly_names (topic, friendly_name) VALUES (?, ?)
         ON CONFLICT(topic) DO UPDATE SET friendly_name=excluded.friendly_name''', (topic, friendly_name))
+    conn.commit()
+    conn.close()
+
 def get_alerts():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute('SELECT topic, friendly_name FROM topic_friendly_names')
     friendly_names = {row[0]: row[1] for row in cursor.fetchall()}
-    cursor.execute('SELECT id, topic, threshold, message, max_alerts, period_seconds, direction FROM alerts')
+    cursor.execute('SELECT id, topic, threshold, message, max_alerts, period_seconds, direction, expression FROM alerts')
     alerts = [
         dict(
             id=row[0],
@@ -334,6 +383,7 @@ def get_alerts():
             max_alerts=row[4],
             period_seconds=row[5],
             direction=row[6],
+            expression=row[7],
             friendly_name=friendly_names.get(row[1], row[1])
         )
         for row in cursor.fetchall()
@@ -347,25 +397,25 @@ def get_alerts():
 def get_alert(alert_id):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute('SELECT id, topic, threshold, message, max_alerts, period_seconds, direction FROM alerts WHERE id=?', (alert_id,))
+    cursor.execute('SELECT id, topic, threshold, message, max_alerts, period_seconds, direction, expression FROM alerts WHERE id=?', (alert_id,))
     row = cursor.fetchone()
     conn.close()
     if row:
-        return dict(id=row[0], topic=row[1], threshold=row[2], message=row[3], max_alerts=row[4], period_seconds=row[5], direction=row[6])
+        return dict(id=row[0], topic=row[1], threshold=row[2], message=row[3], max_alerts=row[4], period_seconds=row[5], direction=row[6], expression=row[7])
     return None
 
-def add_alert(topic, threshold, message, max_alerts=1, period_seconds=3600, direction='above'):
+def add_alert(topic, threshold, message, max_alerts=1, period_seconds=3600, direction='above', expression=None):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute('INSERT INTO alerts (topic, threshold, message, max_alerts, period_seconds, direction) VALUES (?, ?, ?, ?, ?, ?)', (topic, threshold, message, max_alerts, period_seconds, direction))
+    cursor.execute('INSERT INTO alerts (topic, threshold, message, max_alerts, period_seconds, direction, expression) VALUES (?, ?, ?, ?, ?, ?, ?)', (topic, threshold, message, max_alerts, period_seconds, direction, expression))
     conn.commit()
     conn.close()
-    logging.info(f"Alert created: topic={topic}, direction={direction}, value={threshold}, message={message}, max_alerts={max_alerts}, period_seconds={period_seconds}")
+    logging.info(f"Alert created: topic={topic}, direction={direction}, value={threshold}, expression={expression}, message={message}, max_alerts={max_alerts}, period_seconds={period_seconds}")
 
-def update_alert(alert_id, topic, threshold, message, max_alerts=1, period_seconds=3600, direction='above'):
+def update_alert(alert_id, topic, threshold, message, max_alerts=1, period_seconds=3600, direction='above', expression=None):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute('UPDATE alerts SET topic=?, threshold=?, message=?, max_alerts=?, period_seconds=?, direction=? WHERE id=?', (topic, threshold, message, max_alerts, period_seconds, direction, alert_id))
+    cursor.execute('UPDATE alerts SET topic=?, threshold=?, message=?, max_alerts=?, period_seconds=?, direction=?, expression=? WHERE id=?', (topic, threshold, message, max_alerts, period_seconds, direction, expression, alert_id))
     conn.commit()
     conn.close()
 
@@ -382,6 +432,23 @@ def delete_alert(alert_id):
     else:
         logging.info(f"Alert deleted: id={alert_id} (not found in DB)")
 
+def validate_expression(expression):
+    # Compile the rule to check its syntax; returns the first topic it references
+    from mqtt_pushover_alert import compile_rule
+    _, topics = compile_rule(expression)
+    return topics[0]
+
+def validate_alert_topic(topic, direction):
+    if not topic.strip():
+        raise ValueError("Topic is required.")
+    if direction not in ALERT_DIRECTIONS:
+        raise ValueError(f"Unknown direction '{direction}'.")
+    if direction != 'stale' and ('+' in topic or '#' in topic):
+        raise ValueError("Topic filters with + or # are only supported for stale alerts.")
+    from mqtt_pushover_alert import is_valid_topic_filter
+    if not is_valid_topic_filter(topic):
+        raise ValueError("Invalid topic filter: '#' must be the whole last level and '+' a whole level.")
+
 def get_seen_topics():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -407,6 +474,151 @@ def get_alert_history(limit=100):
         for row in rows
     ]
 
+# --- Snapshot export/import ---
+def snapshot_db():
+    # Copy the live database through SQLite's online backup API so the copy is
+    # consistent even while the alerter is writing to it
+    fd, path = tempfile.mkstemp(prefix='settings-snapshot-', suffix='.db')
+    os.close(fd)
+    src = sqlite3.connect(DB_PATH)
+    dst = sqlite3.connect(path)
+    try:
+        src.backup(dst, pages=SNAPSHOT_PAGES_PER_STEP)
+    except Exception:
+        dst.close()
+        os.remove(path)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    return path
+
+def discard_snapshot(conn, path):
+    conn.close()
+    os.remove(path)
+
+def iter_export_rows(conn, name, since=None, until=None, alert_id=None):
+    table, fields = EXPORT_TABLES[name]
+    columns = [column for column, _ in fields]
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    clauses = []
+    params = []
+    if name == 'alert_logs':
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('timestamp <= ?')
+            params.append(until)
+        if alert_id is not None:
+            clauses.append('alert_id = ?')
+            params.append(alert_id)
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += f' ORDER BY {columns[0]}'
+    # Iterating the cursor fetches rows lazily, so memory stays constant
+    for row in conn.execute(query, params):
+        yield dict(zip(columns, row))
+
+def stream_json_export(conn, names, filters):
+    yield '{'
+    for i, name in enumerate(names):
+        yield ('' if i == 0 else ', ') + json.dumps(name) + ': ['
+        first = True
+        for row in iter_export_rows(conn, name, **filters):
+            yield ('' if first else ', ') + json.dumps(row)
+            first = False
+        yield ']'
+    yield '}\n'
+
+def stream_csv_export(conn, name, filters):
+    columns = [column for column, _ in EXPORT_TABLES[name][1]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for row in iter_export_rows(conn, name, **filters):
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow([row[column] for column in columns])
+        yield buffer.getvalue()
+
+def validate_import_rows(name, records):
+    if not isinstance(records, list):
+        raise ValueError(f"'{name}' must be a list")
+    fields = EXPORT_TABLES[name][1]
+    rows = []
+    for index, record in enumerate(records):
+        where = f"{name}[{index}]"
+        if not isinstance(record, dict):
+            raise ValueError(f"{where} must be an object")
+        row = {}
+        for column, kind in fields:
+            value = record.get(column)
+            if value is None and column in NULLABLE_IMPORT_COLUMNS:
+                row[column] = None
+                continue
+            if column not in record:
+                raise ValueError(f"{where} is missing '{column}'")
+            if isinstance(value, bool):
+                valid = False
+            elif kind is float:
+                valid = isinstance(value, (int, float))
+            else:
+                valid = isinstance(value, kind)
+            if not valid:
+                raise ValueError(f"{where}.{column} must be of type {kind.__name__}")
+            row[column] = value
+        rows.append(row)
+    return rows
+
+def validate_import(data):
+    if not isinstance(data, dict):
+        raise ValueError('Import file must contain a JSON object')
+    unknown = set(data) - set(EXPORT_TABLES)
+    if unknown:
+        raise ValueError(f"Unknown section(s): {', '.join(sorted(unknown))}")
+    rows = {name: validate_import_rows(name, data.get(name, [])) for name in EXPORT_TABLES}
+    for index, alert in enumerate(rows['alerts']):
+        try:
+            validate_alert_topic(alert['topic'], alert['direction'])
+        except ValueError as e:
+            raise ValueError(f"alerts[{index}]: {e}")
+        if alert['direction'] == 'stale' and alert['threshold'] < 1:
+            raise ValueError(f"alerts[{index}].threshold must be at least 1 second for stale alerts")
+        if alert['max_alerts'] < 1:
+            raise ValueError(f"alerts[{index}].max_alerts must be at least 1")
+        if alert['period_seconds'] < 1:
+            raise ValueError(f"alerts[{index}].period_seconds must be at least 1")
+        if alert['expression']:
+            try:
+                validate_expression(alert['expression'])
+            except ValueError as e:
+                raise ValueError(f"alerts[{index}].expression is invalid: {e}")
+    for index, name in enumerate(rows['friendly_names']):
+        if not name['topic'].strip():
+            raise ValueError(f"friendly_names[{index}].topic must not be empty")
+    return rows
+
+def import_snapshot(data):
+    rows = validate_import(data)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # History of deleted alerts is kept (delete_alert leaves it in
+            # place and foreign keys are not enforced), so it is imported as-is
+            for name, (table, fields) in EXPORT_TABLES.items():
+                columns = [column for column, _ in fields]
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    ([row[column] for column in columns] for row in rows[name]))
+    finally:
+        conn.close()
+    counts = {name: len(rows[name]) for name in EXPORT_TABLES}
+    logging.info(f"Snapshot imported: {counts}")
+    return counts
+
 @app.template_filter('datetimeformat')
 def datetimeformat_filter(value):
     try:
@@ -429,30 +641,47 @@ def index():
 
 @app.route('/alerts')
 def alerts():
+    alerts = get_alerts()
+    topics = get_seen_topics()
+    return render_template_string(ALERTS_TEMPLATE, alerts=alerts, topics=topics)
+
+def parse_alert_form(form):
+    # Shared by the add and edit routes; raises ValueError on bad input
+    topic = form['topic']
+    expression = form.get('expression', '').strip() or None
+    if expression:
+        # Compound rules are stored under the first topic they reference
+        topic = validate_expression(expression)
+        threshold = float(form.get('threshold') or 0)
+    elif not form.get('threshold'):
+        raise ValueError("Value is required without an expression.")
+    else:
+        threshold = float(form['threshold'])
+    max_alerts = int(form['max_alerts'])
+    period_seconds = int(form['period_seconds'])
+    if not math.isfinite(threshold):
+        raise ValueError("Threshold must be a finite number.")
+    if threshold < 0:
+        raise ValueError("Threshold must be non-negative.")
+    if max_alerts < 1:
+        raise ValueError("Max alerts must be at least 1.")
+    if period_seconds < 1:
+        raise ValueError("Period seconds must be at least 1.")
+    direction = form.get('direction', 'above')
+    if not expression:
+        validate_alert_topic(topic, direction)
+        if direction == 'stale' and threshold < 1:
+            raise ValueError("Stale time must be at least 1 second.")
+    return topic, threshold, form['message'], max_alerts, period_seconds, direction, expression
+
 @app.route('/alerts/add', methods=['POST'])
 def add_alert_route():
-    topic = request.form['topic']
     try:
-        threshold = float(request.form['threshold'])
-        max_alerts = int(request.form['max_alerts'])
-        period_seconds = int(request.form['period_seconds'])
-        if threshold < 0:
-            raise ValueError("Threshold must be non-negative.")
-        if max_alerts < 1:
-            raise ValueError("Max alerts must be at least 1.")
-        if period_seconds < 1:
-            raise ValueError("Period seconds must be at least 1.")
+        fields = parse_alert_form(request.form)
     except ValueError as e:
         flash(f"Invalid input: {e}")
         return redirect(url_for('alerts'))
-    
-    message = request.form['message']
-    direction = request.form.get('direction', 'above')
-    add_alert(topic, threshold, message, max_alerts, period_seconds, direction)
-    flash('Alert added!')
-    return redirect(url_for('alerts'))
-    direction = request.form.get('direction', 'above')
-    add_alert(topic, threshold, message, max_alerts, period_seconds, direction)
+    add_alert(*fields)
     flash('Alert added!')
     return redirect(url_for('alerts'))
 
@@ -464,13 +693,12 @@ def edit_alert(alert_id):
         flash('Alert not found!')
         return redirect(url_for('alerts'))
     if request.method == 'POST':
-        topic = request.form['topic']
-        threshold = request.form['threshold']
-        message = request.form['message']
-        max_alerts = request.form['max_alerts']
-        period_seconds = request.form['period_seconds']
-        direction = request.form.get('direction', 'above')
-        update_alert(alert_id, topic, threshold, message, max_alerts, period_seconds, direction)
+        try:
+            fields = parse_alert_form(request.form)
+        except ValueError as e:
+            flash(f"Invalid input: {e}")
+            return redirect(url_for('alerts'))
+        update_alert(alert_id, *fields)
         flash('Alert updated!')
         return redirect(url_for('alerts'))
     return render_template_string(EDIT_ALERT_TEMPLATE, alert=alert, topics=topics)
@@ -488,7 +716,51 @@ def alert_history():
 
 @app.route('/download_db')
 def download_db():
-    return send_file(DB_PATH, as_attachment=True, download_name='settings.db')
+    path = snapshot_db()
+    snapshot = open(path, 'rb')
+    # The open handle keeps the unlinked snapshot readable until send_file closes it
+    os.remove(path)
+    return send_file(snapshot, as_attachment=True, download_name='settings.db', mimetype='application/x-sqlite3')
+
+@app.route('/export/<name>.<fmt>')
+def export_route(name, fmt):
+    if name == 'all' and fmt == 'json':
+        names = list(EXPORT_TABLES)
+    elif name in EXPORT_TABLES and fmt in ('json', 'csv'):
+        names = [name]
+    else:
+        return f"Unknown export: {name}.{fmt}", 404
+    filters = {}
+    for key in ('since', 'until', 'alert_id'):
+        value = request.args.get(key)
+        try:
+            filters[key] = int(value) if value not in (None, '') else None
+        except ValueError:
+            return f"Invalid {key}: {value!r} is not an integer", 400
+    path = snapshot_db()
+    # The response body may be iterated outside the request handler's thread
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if fmt == 'json':
+        response = Response(stream_json_export(conn, names, filters), mimetype='application/json')
+    else:
+        response = Response(stream_csv_export(conn, name, filters), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{fmt}'
+    response.call_on_close(lambda: discard_snapshot(conn, path))
+    return response
+
+@app.route('/import', methods=['POST'])
+def import_route():
+    upload = request.files.get('snapshot')
+    if not upload or not upload.filename:
+        flash('No import file selected.')
+        return redirect(url_for('alerts'))
+    try:
+        counts = import_snapshot(json.load(upload.stream))
+    except (ValueError, sqlite3.Error) as e:
+        flash(f"Import failed: {e}")
+        return redirect(url_for('alerts'))
+    flash(f"Imported {counts['alerts']} alerts, {counts['friendly_names']} friendly names and {counts['alert_logs']} history entries.")
+    return redirect(url_for('alerts'))
 
 @app.route('/set_friendly_name', methods=['POST'])
 def set_friendly_name_route():
@@ -496,8 +768,9 @@ def set_friendly_name_route():
     friendly_name = request.form['friendly_name']
     set_friendly_name(topic, friendly_name)
     flash(f'Friendly name for "{topic}" set to "{friendly_name}"')
-    prefix = f"[{friendly_name}] " if friendly_name and friendly_name != alert['topic'] else f"[{alert['topic']}] "
-    message = f"[TEST] {prefix}{alert['message'].format(value=test_value, threshold=alert['threshold'])}"
+    return redirect(url_for('alerts'))
+
+@app.route('/test_alert/<int:alert_id>', methods=['POST'])
 def test_alert(alert_id):
     alert = get_alert(alert_id)
     if not alert: